@@ -10,77 +10,422 @@ Usage:
     Run this script to initiate a conversation between configured agents, display chat history,
     cost, and summary. Configure agents in `config.yaml`.
 """
+import asyncio
+import inspect
+import itertools
 import yaml
 import json
+import logging
+import re
+import sys
 import time
-from typing import Dict, List, Optional
+from collections import deque
+from collections.abc import Mapping
+from types import MappingProxyType
+from typing import Any, AsyncIterable, AsyncIterator, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 from src.utils import get_gemini_api_key
+from src.prompt_assembler import PromptAssembler
+from src.llm_cache import CachedLLM
+from src.file_cache import FileCache
 import google.generativeai as genai
-from autogen import ConversableAgent
-import pprint
-import backoff
+from autogen import Agent, ChatResult, ConversableAgent
+import orjson
+from google.api_core import exceptions as google_exceptions
+from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_exponential_jitter
+
+logger = logging.getLogger(__name__)
+
+# Phrases that end a conversation when an agent receives them.
+_TERMINATION_PHRASES = ("See you again later",)
+_TERM_RE = re.compile("|".join(map(re.escape, _TERMINATION_PHRASES))).search
+# Characters carried between streamed chunks so a phrase split across chunks is still seen.
+_TERM_OVERLAP = max(map(len, _TERMINATION_PHRASES)) - 1
+
+# Retry only transient transport failures; configuration and lookup errors fail fast.
+_retry_transient = retry(
+    stop=stop_after_attempt(3),
+    wait=wait_exponential_jitter(initial=0.5, max=8),
+    retry=retry_if_exception_type((google_exceptions.ResourceExhausted,
+                                   google_exceptions.ServiceUnavailable,
+                                   TimeoutError)),
+    reraise=True,
+)
+
+
+def _is_term(msg: dict) -> bool:
+    """Return True if `msg` contains a termination phrase."""
+    return _TERM_RE(msg.get("content") or "") is not None
+
+
+def _iter_stream(chunks: Iterable) -> Iterator[str]:
+    """
+    Yield streamed response text, stopping once a termination phrase has arrived.
+
+    Chunks without candidates or parts (e.g. usage-only, blocked or trailing finish-reason
+    chunks) carry no text and are skipped. On an early stop the underlying stream is
+    cancelled so Gemini stops generating.
+    """
+    tail = ""
+    for chunk in chunks:
+        if not _has_text(chunk):
+            continue
+        text = chunk.text
+        yield text
+        tail = tail[-_TERM_OVERLAP:] + text
+        if _TERM_RE(tail):
+            _stream_closer(chunks, "close")()
+            return
+
+
+async def _aiter_stream(chunks: AsyncIterable) -> AsyncIterator[str]:
+    """Async counterpart of `_iter_stream`."""
+    tail = ""
+    async for chunk in chunks:
+        if not _has_text(chunk):
+            continue
+        text = chunk.text
+        yield text
+        tail = tail[-_TERM_OVERLAP:] + text
+        if _TERM_RE(tail):
+            result = _stream_closer(chunks, "aclose")()
+            if inspect.isawaitable(result):
+                await result
+            return
+
+
+def _has_text(chunk: Any) -> bool:
+    """Return whether a streamed chunk has text; `chunk.text` raises when it has none."""
+    return bool(chunk.candidates and chunk.candidates[0].content.parts)
+
+
+def _stream_closer(chunks: Any, close_name: str) -> Callable[[], Any]:
+    """
+    Return a callable that stops the transport behind a streamed response.
+
+    Gemini responses wrap their gRPC call (or generator) in `_iterator`; a gRPC call is
+    cancelled, a generator closed with `close_name`. Falls back to a no-op.
+    """
+    stream = getattr(chunks, "_iterator", None) or chunks
+    return getattr(stream, "cancel", None) or getattr(stream, close_name, None) or (lambda: None)
+
+
+def _topics_prompt(topics: List[str]) -> str:
+    """Build the prompt that folds earlier conversation topics into one sentence."""
+    listing = "\n".join(f"- {topic}" for topic in topics)
+    return f"Summarize these earlier conversation topics in one sentence:\n{listing}"
+
+def _dump(obj: Any) -> None:
+    """
+    Write `obj` to stdout as indented JSON; unsupported values are rendered with str().
+
+    Bytes go straight to the underlying buffer when there is one; text-only streams (e.g.
+    `redirect_stdout` targets or Jupyter) get the decoded string instead.
+    """
+    data = orjson.dumps(
+        obj, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_DATACLASS, default=str
+    ) + b"\n"
+    buffer = getattr(sys.stdout, "buffer", None)
+    if buffer is None:
+        sys.stdout.write(data.decode())
+        return
+    sys.stdout.flush()
+    buffer.write(data)
+    buffer.flush()
+
+class _SharedConfigAgent(ConversableAgent):
+    """ConversableAgent that keeps a read-only `llm_config` by reference instead of deep-copying it."""
+
+    def _validate_llm_config(self, llm_config):
+        # ConversableAgent deep-copies dict configs before this hook; a MappingProxyType skips
+        # that copy, so every agent built from the same proxy shares one config object. The base
+        # checks still run, on a dict view of the proxy.
+        if isinstance(llm_config, MappingProxyType):
+            super()._validate_llm_config(dict(llm_config))
+            self.llm_config = llm_config
+        else:
+            super()._validate_llm_config(llm_config)
+
+    def update_function_signature(self, func_sig, is_remove):
+        self._own_llm_config()
+        super().update_function_signature(func_sig, is_remove)
+
+    def update_tool_signature(self, tool_sig, is_remove):
+        self._own_llm_config()
+        super().update_tool_signature(tool_sig, is_remove)
+
+    def _own_llm_config(self) -> None:
+        """Replace the shared read-only config with a private copy before AutoGen edits it."""
+        if isinstance(self.llm_config, MappingProxyType):
+            self.llm_config = dict(self.llm_config)
+
+class LazyAgentDict(Mapping):
+    """Read-only mapping of agent names to agents that builds each agent on first access."""
+
+    def __init__(self, configs: Dict[str, dict], factory: Callable[[dict], ConversableAgent]):
+        """
+        Initialize the mapping from raw agent configurations.
+
+        Args:
+            configs (Dict[str, dict]): Agent configurations keyed by agent name.
+            factory (Callable[[dict], ConversableAgent]): Builds an agent from its configuration.
+        """
+        self._configs = configs
+        self._factory = factory
+        self._agents: Dict[str, ConversableAgent] = {}
+
+    def __getitem__(self, name: str) -> ConversableAgent:
+        agent = self._agents.get(name)
+        if agent is None:
+            agent = self._agents[name] = self._factory(self._configs[name])
+        return agent
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._configs
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._configs)
+
+    def __len__(self) -> int:
+        return len(self._configs)
 
 class ConversationManager:
     """Manages multi-agent conversations with topic tracking and error handling."""
     
-    def __init__(self, config_path: str = "config.yaml"):
+    def __init__(self, config_path: str = "config.yaml", max_history: int = 1024):
         """
         Initialize the ConversationManager with agent configurations from a YAML file.
 
         Args:
             config_path (str): Path to the YAML configuration file.
+            max_history (int): Most topic history entries kept; when full, the oldest half
+                is compacted into a single summary entry.
+
+        Raises:
+            ValueError: If max_history is less than 4, too small for compaction to free room.
         """
-        self.agents: Dict[str, ConversableAgent] = {}
-        self.topic_history: List[Dict[str, str]] = []
+        if max_history < 4:
+            raise ValueError("max_history must be at least 4")
+        self.max_history = max_history
+        self.agents: Mapping[str, ConversableAgent] = {}
+        self.topic_history = []
+        self._assemblers: Dict[Tuple[str, str], PromptAssembler] = {}
+        self._cache = CachedLLM(threshold=0.85, ttl=1800, context_window=4)
         self.config_path = config_path
         self.llm_config = self._configure_llm()
         self._load_agents()
 
-    def _configure_llm(self) -> dict:
+    @property
+    def topic_history(self) -> List[Dict[str, str]]:
+        """
+        Topics discussed so far, oldest first.
+
+        History is stored as parallel bounded columns; this property builds a fresh list
+        of dicts on each access, so mutate it through `_record_topic` or by reassignment.
+        """
+        return [
+            {"initiator": initiator, "recipient": recipient, "topic": topic, "timestamp": timestamp}
+            for initiator, recipient, topic, timestamp
+            in zip(self._initiators, self._recipients, self._topics, self._timestamps)
+        ]
+
+    @topic_history.setter
+    def topic_history(self, history: List[Dict[str, str]]) -> None:
+        """
+        Replace the topic history; the per-agent index is rebuilt on next lookup.
+        Only the newest `max_history` entries are kept.
+        """
+        maxlen = self.max_history
+        self._initiators = deque((entry["initiator"] for entry in history), maxlen)
+        self._recipients = deque((entry["recipient"] for entry in history), maxlen)
+        self._topics = deque((entry["topic"] for entry in history), maxlen)
+        self._timestamps = deque((entry["timestamp"] for entry in history), maxlen)
+        self._last_topic_by_agent: Dict[str, str] = {}
+
+    def _configure_llm(self) -> MappingProxyType:
         """
         Configure the language model settings for AutoGen agents using the Gemini API.
 
+        Also creates the single Gemini model handle shared by every agent's replies, so all
+        agents reuse one client and its open connections.
+
         Returns:
-            dict: Configuration dictionary with model details, API key, and token limit.
+            MappingProxyType: Read-only configuration with model details, API key, and token
+                limit, shared by reference across all agents.
         """
         api_key = get_gemini_api_key()
-        return {
-            "config_list": [{
-                "model": "gemini-1.5-flash",
+        model_name = "gemini-1.5-flash"
+        genai.configure(api_key=api_key)
+        self._model = genai.GenerativeModel(model_name)
+        return MappingProxyType({
+            "config_list": ({
+                "model": model_name,
                 "api_key": api_key,
                 "api_type": "google"
-            }],
+            },),
             "max_tokens": 50
-        }
+        })
 
     def _load_agents(self) -> None:
         """
-        Load agent configurations from the YAML file and create ConversableAgent instances.
+        Load agent configurations from the YAML file. Agents are created lazily on first access.
 
         Raises:
             FileNotFoundError: If the config file is not found.
             yaml.YAMLError: If the config file is invalid.
         """
         try:
-            with open(self.config_path, 'r') as f:
-                config = yaml.safe_load(f)
+            config = FileCache.instance().get(self.config_path)
         except FileNotFoundError:
             raise FileNotFoundError(f"Configuration file {self.config_path} not found")
         except yaml.YAMLError as e:
             raise yaml.YAMLError(f"Error parsing {self.config_path}: {e}")
 
-        for agent_config in config.get('agents', []):
-            name = agent_config.get('name')
-            system_message = agent_config.get('system_message')
-            self.agents[name] = ConversableAgent(
-                name=name,
-                system_message=system_message,
-                llm_config=self.llm_config,
-                human_input_mode="NEVER",
-                is_termination_msg=lambda msg: "See you again later" in msg["content"],
-            )
+        configs = {agent_config.get('name'): agent_config for agent_config in config.get('agents', [])}
+        self.agents = LazyAgentDict(configs, self._create_agent)
+
+    def _create_agent(self, agent_config: dict) -> ConversableAgent:
+        """
+        Create a ConversableAgent from its configuration entry.
+
+        Args:
+            agent_config (dict): Agent entry from the YAML file.
+
+        Returns:
+            ConversableAgent: The configured agent.
+        """
+        agent = _SharedConfigAgent(
+            name=agent_config.get('name'),
+            system_message=agent_config.get('system_message'),
+            llm_config=self.llm_config,
+            human_input_mode="NEVER",
+            is_termination_msg=_is_term,
+        )
+        # Slot in just ahead of AutoGen's own LLM reply so termination, tool and
+        # function-call handlers are still checked first.
+        agent.register_reply([Agent, None], self._make_reply(agent),
+                             position=len(agent._reply_func_list) - 2)
+        return agent
+
+    def _make_reply(self, agent: ConversableAgent) -> Callable:
+        """
+        Build the AutoGen reply function for `agent`, specialized to its fixed settings.
+
+        The model handle, cache key and generation config are resolved once here, so a turn
+        only assembles the prompt, checks the response cache and, on a miss, makes one
+        streaming request. Prompts are ordered static system prompt, committed history, then
+        the most recent turn. Streaming stops as soon as a termination phrase arrives, since
+        the chat ends there.
+
+        Args:
+            agent (ConversableAgent): The agent the reply function is registered on.
+
+        Returns:
+            Callable: A reply function with AutoGen's `(recipient, messages, sender, config)`
+                signature returning a `(final, reply)` pair.
+        """
+        cache, model, build_contents = self._cache, self._model, self._build_contents
+        cache_key = self._cache_key(agent.system_message)
+        generation_config = {"max_output_tokens": cache_key["max_tokens"]}
+
+        def reply(recipient: ConversableAgent, messages: Optional[List[Dict]] = None,
+                  sender: Optional[Agent] = None, config: Optional[dict] = None) -> Tuple[bool, str]:
+            contents = build_contents(recipient, sender.name if sender else "", messages)
+            text = cache.get(contents, **cache_key)
+            if text is None:
+                stream = model.generate_content(contents, generation_config=generation_config, stream=True)
+                text = "".join(_iter_stream(stream))
+                cache.set(contents, text, **cache_key)
+            return True, text
+
+        return reply
+
+    async def _cached_reply_async(self, recipient: ConversableAgent, messages: List[Dict],
+                                  sender_name: str) -> str:
+        """
+        Async counterpart of the `_make_reply` reply function, used by `initiate_conversation_async`.
+
+        Args:
+            recipient (ConversableAgent): The agent producing the reply.
+            messages (List[Dict]): Conversation so far from the recipient's perspective.
+            sender_name (str): Name of the agent that sent the last message.
+
+        Returns:
+            str: The reply text.
+        """
+        contents = self._build_contents(recipient, sender_name, messages)
+        cache_key = self._cache_key(recipient.system_message)
+        reply = await self._cache.aget(contents, **cache_key)
+        if reply is None:
+            reply = await self._stream_reply_async(contents)
+            await self._cache.aset(contents, reply, **cache_key)
+        return reply
+
+    @_retry_transient
+    async def _stream_reply_async(self, contents: Any) -> str:
+        """
+        Stream a reply from Gemini, stopping early once a termination phrase arrives.
+
+        Args:
+            contents (Any): Request contents.
+
+        Returns:
+            str: The reply text received.
+        """
+        response = await self._model.generate_content_async(
+            contents, generation_config={"max_output_tokens": self.llm_config["max_tokens"]},
+            stream=True,
+        )
+        return "".join([text async for text in _aiter_stream(response)])
+
+    @_retry_transient
+    async def _generate_async(self, contents: Any) -> str:
+        """
+        Call Gemini asynchronously, retrying transient transport errors with jittered backoff.
+
+        Args:
+            contents (Any): Request contents.
+
+        Returns:
+            str: The response text.
+        """
+        response = await self._model.generate_content_async(
+            contents, generation_config={"max_output_tokens": self.llm_config["max_tokens"]}
+        )
+        return response.text
+
+    def _build_contents(self, recipient: ConversableAgent, sender_name: str,
+                        messages: List[Dict]) -> List[Dict]:
+        """
+        Assemble Gemini contents for a reply.
+
+        Args:
+            recipient (ConversableAgent): The agent producing the reply.
+            sender_name (str): Name of the agent that sent the last message.
+            messages (List[Dict]): Conversation so far from the recipient's perspective.
+
+        Returns:
+            List[Dict]: Request contents.
+        """
+        key = (recipient.name, sender_name)
+        assembler = self._assemblers.get(key)
+        if assembler is None:
+            assembler = self._assemblers[key] = PromptAssembler(recipient.system_message)
+        return assembler.build(messages)
+
+    def _cache_key(self, system_message: str) -> Dict:
+        """
+        Return the response-cache settings for an agent with `system_message`.
+
+        Args:
+            system_message (str): The agent's system prompt.
+
+        Returns:
+            Dict: Model name, system message and token limit.
+        """
+        return {"model": self.llm_config["config_list"][0]["model"],
+                "system_message": system_message,
+                "max_tokens": self.llm_config["max_tokens"]}
 
-    @backoff.on_exception(backoff.expo, Exception, max_tries=3)
     def initiate_conversation(self, initiator_name: str, recipient_name: str, 
                              initial_message: str, max_turns: int = 2) -> dict:
         """
@@ -105,22 +450,221 @@ class ConversationManager:
         recipient = self.agents[recipient_name]
         
         # Track the initial topic
-        self.topic_history.append({
-            "initiator": initiator_name,
-            "recipient": recipient_name,
-            "topic": initial_message,
-            "timestamp": time.time()
-        })
+        self._record_topic(initiator_name, recipient_name, initial_message)
+
+        return self._run_chat(initiator, recipient, initial_message, max_turns)
+
+    @_retry_transient
+    def _run_chat(self, initiator: ConversableAgent, recipient: ConversableAgent,
+                  initial_message: str, max_turns: int) -> ChatResult:
+        """
+        Run an AutoGen chat, retrying on transient transport errors with jittered backoff.
 
-        # Start the conversation with retry logic
-        result = initiator.initiate_chat(
+        Args:
+            initiator (ConversableAgent): The initiating agent.
+            recipient (ConversableAgent): The recipient agent.
+            initial_message (str): Initial message to start the conversation.
+            max_turns (int): Maximum number of conversation turns.
+
+        Returns:
+            ChatResult: Result of the conversation, including chat history and cost.
+        """
+        return initiator.initiate_chat(
             recipient=recipient,
             message=initial_message,
             max_turns=max_turns,
             summary_method="reflection_with_llm",
             summary_prompt="Summarize the conversation",
         )
-        return result
+
+    async def initiate_conversation_async(self, initiator_name: str, recipient_name: str,
+                                          initial_message: str, max_turns: int = 2,
+                                          recall_topic: bool = False) -> ChatResult:
+        """
+        Run a conversation between two agents on asyncio, calling Gemini without blocking.
+
+        Turns are inherently sequential, but the closing summary is independent of any
+        follow-up: with `recall_topic`, the recipient asks the initiator about their last
+        topic and that exchange runs concurrently with the summary via `asyncio.gather`.
+
+        Args:
+            initiator_name (str): Name of the initiating agent.
+            recipient_name (str): Name of the recipient agent.
+            initial_message (str): Initial message to start the conversation.
+            max_turns (int): Maximum number of conversation turns.
+            recall_topic (bool): Whether the recipient follows up about the last topic.
+
+        Returns:
+            ChatResult: Chat history (from the initiator's perspective) and summary.
+                Token cost is not tracked on this path.
+
+        Raises:
+            KeyError: If initiator or recipient name is not found in agents.
+        """
+        if initiator_name not in self.agents or recipient_name not in self.agents:
+            raise KeyError("Initiator or recipient agent not found")
+
+        initiator = self.agents[initiator_name]
+        recipient = self.agents[recipient_name]
+        await self._record_topic_async(initiator_name, recipient_name, initial_message)
+
+        history = [{"content": initial_message, "role": "assistant", "name": initiator_name}]
+        for turn in range(max_turns):
+            if turn > 0:
+                message = await self._next_message_async(initiator, recipient, history)
+                if message is None:
+                    break
+                history.append(message)
+            message = await self._next_message_async(recipient, initiator, history)
+            if message is None:
+                break
+            history.append(message)
+
+        summary_task = self._summarize_async(list(history))
+        last_topic = self.get_last_topic(recipient_name) if recall_topic else None
+        if last_topic:
+            history.append({
+                "content": f"What's the last topic we discussed? I recall: {last_topic}",
+                "role": "user",
+                "name": recipient_name,
+            })
+            summary, answer = await asyncio.gather(
+                summary_task, self._next_message_async(initiator, recipient, history)
+            )
+            if answer is not None:
+                history.append(answer)
+        else:
+            summary = await summary_task
+
+        return ChatResult(chat_history=history, summary=summary, cost={}, human_input=[])
+
+    async def _next_message_async(self, speaker: ConversableAgent, listener: ConversableAgent,
+                                  history: List[Dict]) -> Optional[Dict]:
+        """
+        Generate the speaker's next message, or None if the last message ends the chat.
+
+        Args:
+            speaker (ConversableAgent): The agent about to speak.
+            listener (ConversableAgent): The agent being addressed.
+            history (List[Dict]): Messages so far, each tagged with the sender's name.
+
+        Returns:
+            Optional[Dict]: The new message in the initiator-perspective history format.
+        """
+        if _is_term(history[-1]):
+            return None
+        messages = [
+            {"content": m["content"], "role": "assistant" if m["name"] == speaker.name else "user"}
+            for m in history
+        ]
+        reply = await self._cached_reply_async(speaker, messages, listener.name)
+        role = "assistant" if speaker.name == history[0]["name"] else "user"
+        return {"content": reply, "role": role, "name": speaker.name}
+
+    async def _summarize_async(self, history: List[Dict]) -> str:
+        """
+        Summarize a finished conversation with a single Gemini call.
+
+        Args:
+            history (List[Dict]): Messages tagged with the sender's name.
+
+        Returns:
+            str: The summary text.
+        """
+        transcript = "\n".join(f"{m['name']}: {m['content']}" for m in history)
+        return await self._generate_async(f"Summarize the conversation\n\n{transcript}")
+
+    def _record_topic(self, initiator_name: str, recipient_name: str, topic: str) -> None:
+        """
+        Append a topic to the history and update the per-agent index.
+
+        Args:
+            initiator_name (str): Name of the initiating agent.
+            recipient_name (str): Name of the recipient agent.
+            topic (str): The topic that opened the conversation.
+        """
+        if len(self._topics) == self.max_history:
+            try:
+                summary = self._summarize_topics(self._oldest_topics())
+            except Exception as e:
+                logger.warning("Topic summary failed; dropping the oldest topics unsummarized: %s", e)
+                summary = None
+            self._compact_topics(summary)
+        self._initiators.append(initiator_name)
+        self._recipients.append(recipient_name)
+        self._topics.append(topic)
+        self._timestamps.append(time.time())
+        self._last_topic_by_agent[initiator_name] = topic
+        self._last_topic_by_agent[recipient_name] = topic
+
+    async def _record_topic_async(self, initiator_name: str, recipient_name: str, topic: str) -> None:
+        """
+        Like `_record_topic`, but summarizes a full history without blocking the event loop.
+
+        Concurrent callers may compact while this one awaits its summary; a summary whose
+        topics are no longer the oldest is discarded and compaction re-checked, so no entry
+        is dropped unsummarized and the final append never triggers a blocking summary.
+
+        Args:
+            initiator_name (str): Name of the initiating agent.
+            recipient_name (str): Name of the recipient agent.
+            topic (str): The topic that opened the conversation.
+        """
+        while len(self._topics) == self.max_history:
+            topics = self._oldest_topics()
+            try:
+                summary = await self._generate_async(_topics_prompt(topics))
+            except Exception as e:
+                logger.warning("Topic summary failed; dropping the oldest topics unsummarized: %s", e)
+                summary = None
+            if len(self._topics) == self.max_history and self._oldest_topics() == topics:
+                self._compact_topics(summary)
+        self._record_topic(initiator_name, recipient_name, topic)
+
+    def _oldest_topics(self) -> List[str]:
+        """Return the oldest half of the topic history, the part compaction replaces."""
+        return list(itertools.islice(self._topics, self.max_history // 2))
+
+    def _compact_topics(self, summary: Optional[str]) -> None:
+        """
+        Replace the oldest half of the topic history with one summary entry.
+
+        The summary is produced before calling this, so nothing is removed until it exists.
+        The summary entry has empty initiator and recipient names and keeps the timestamp
+        of the oldest topic it replaces. Agents' last-topic lookups are unaffected.
+
+        Args:
+            summary (Optional[str]): Summary of the topics returned by `_oldest_topics`, or
+                None to evict them without one (used when the summary call failed).
+        """
+        count = self.max_history // 2
+        timestamp = self._timestamps[0]
+        for column in (self._initiators, self._recipients, self._topics, self._timestamps):
+            for _ in range(count):
+                column.popleft()
+        if summary is None:
+            return
+        self._initiators.appendleft("")
+        self._recipients.appendleft("")
+        self._topics.appendleft(summary)
+        self._timestamps.appendleft(timestamp)
+
+    @_retry_transient
+    def _summarize_topics(self, topics: List[str]) -> str:
+        """
+        Summarize earlier conversation topics with a single Gemini call.
+
+        Args:
+            topics (List[str]): Topics to summarize, oldest first.
+
+        Returns:
+            str: The summary text.
+        """
+        response = self._model.generate_content(
+            _topics_prompt(topics),
+            generation_config={"max_output_tokens": self.llm_config["max_tokens"]},
+        )
+        return response.text
 
     def get_last_topic(self, agent_name: str) -> Optional[str]:
         """
@@ -132,10 +676,11 @@ class ConversationManager:
         Returns:
             Optional[str]: The last topic discussed, or None if no history exists.
         """
-        for topic in reversed(self.topic_history):
-            if topic["initiator"] == agent_name or topic["recipient"] == agent_name:
-                return topic["topic"]
-        return None
+        if not self._last_topic_by_agent and self._topics:
+            for initiator, recipient, topic in zip(self._initiators, self._recipients, self._topics):
+                self._last_topic_by_agent[initiator] = topic
+                self._last_topic_by_agent[recipient] = topic
+        return self._last_topic_by_agent.get(agent_name)
 
 def main():
     """
@@ -166,13 +711,13 @@ def main():
 
         # Display results
         print("Chat History:")
-        pprint.pprint(chat_result.chat_history)
+        _dump(chat_result.chat_history)
         print("\nCost:")
-        pprint.pprint(chat_result.cost)
+        _dump(chat_result.cost)
         print("\nSummary:")
-        pprint.pprint(chat_result.summary)
+        _dump(chat_result.summary)
         print("\nTopic History:")
-        pprint.pprint(manager.topic_history)
+        _dump(manager.topic_history)
 
     except Exception as e:
         print(f"Error during conversation: {e}")
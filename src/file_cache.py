@@ -0,0 +1,108 @@
+"""
+file_cache.py
+
+This module caches parsed YAML files keyed by path and modification time. Parsed results are kept
+in a process-local dictionary and, optionally, in a `shelve` database so later processes can skip
+parsing an unchanged file entirely.
+
+Usage:
+    config = FileCache.instance().get("config.yaml")
+"""
+import dbm
+import os
+import pickle
+import shelve
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+import yaml
+
+try:
+    from yaml import CSafeLoader as _SafeLoader
+except ImportError:  # PyYAML built without libyaml
+    from yaml import SafeLoader as _SafeLoader
+
+_SHELF_ERRORS = (OSError, pickle.PickleError, *dbm.error)
+
+
+class FileCache:
+    """Caches parsed YAML documents keyed by path, valid while the file's mtime is unchanged."""
+
+    _instance: Optional["FileCache"] = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, shelf_path: Optional[str] = None):
+        """
+        Initialize an empty cache.
+
+        Args:
+            shelf_path (Optional[str]): Path of an optional persistent `shelve` backend; the
+                default None keeps the cache in memory only. Only point this at a location you
+                control, since shelve entries are unpickled on read.
+        """
+        self.shelf_path = shelf_path
+        # Latest (mtime, parsed document) per path; an older mtime is replaced, not kept.
+        self._mem: Dict[str, Tuple[float, Any]] = {}
+
+    @classmethod
+    def instance(cls) -> "FileCache":
+        """
+        Return the process-wide cache, creating it on first use.
+
+        Returns:
+            FileCache: The shared cache instance.
+        """
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    def get(self, path: str) -> Any:
+        """
+        Return the parsed contents of the YAML file at `path`. The result is shared between
+        callers and must be treated as read-only.
+
+        Args:
+            path (str): Path to the YAML file.
+
+        Returns:
+            Any: The parsed YAML document.
+
+        Raises:
+            FileNotFoundError: If the file does not exist.
+            yaml.YAMLError: If the file is not valid YAML.
+        """
+        path = os.path.abspath(path)
+        mtime = os.path.getmtime(path)
+        entry = self._mem.get(path)
+        if entry is not None and entry[0] == mtime:
+            return entry[1]
+
+        shelf_key = f"{path}:{mtime!r}"
+        data = self._shelf_get(shelf_key)
+        if data is None:
+            with open(path, 'r') as f:
+                data = yaml.load(f, Loader=_SafeLoader)
+            self._shelf_set(shelf_key, data)
+        self._mem[path] = (mtime, data)
+        return data
+
+    def _shelf_get(self, key: str) -> Any:
+        """Read `key` from the persistent backend, or None if absent or unavailable."""
+        if self.shelf_path is None:
+            return None
+        try:
+            with shelve.open(self.shelf_path, flag='r') as shelf:
+                return shelf.get(key)
+        except _SHELF_ERRORS:
+            return None
+
+    def _shelf_set(self, key: str, data: Any) -> None:
+        """Write `key` to the persistent backend, ignoring an unwritable location."""
+        if self.shelf_path is None:
+            return
+        try:
+            with shelve.open(self.shelf_path) as shelf:
+                shelf[key] = data
+        except _SHELF_ERRORS:
+            pass
@@ -0,0 +1,248 @@
+"""
+llm_cache.py
+
+This module provides a response cache for Gemini replies. Lookups first try an exact hash of the
+request (model, system message, token limit and contents) and then fall back to embedding
+similarity over the most recent conversation turns, so repeated or paraphrased prompts skip the
+network call.
+
+Usage:
+    cache = CachedLLM()
+    reply = cache.get(contents, model=..., system_message=..., max_tokens=...)
+    if reply is None:
+        reply = call_gemini(contents)
+        cache.set(contents, reply, model=..., system_message=..., max_tokens=...)
+"""
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+import google.generativeai as genai
+import numpy as np
+
+
+def _gemini_embed(text: str) -> List[float]:
+    """Embed `text` with Gemini's text embedding model."""
+    return genai.embed_content(model="models/text-embedding-004", content=text)["embedding"]
+
+
+def _normalize(vector: List[float]) -> np.ndarray:
+    """Scale `vector` to unit length so cosine similarity reduces to a dot product."""
+    array = np.asarray(vector, dtype=np.float32)
+    norm = float(np.linalg.norm(array)) or 1.0
+    return array / norm
+
+
+class CachedLLM:
+    """Exact-match plus semantic cache for LLM replies."""
+
+    def __init__(self, threshold: Optional[float] = 0.85, ttl: float = 1800,
+                 context_window: int = 4, max_entries: int = 1024,
+                 embed_fn: Optional[Callable[[str], List[float]]] = None):
+        """
+        Initialize an empty cache.
+
+        Args:
+            threshold (Optional[float]): Minimum cosine similarity for a semantic hit; None disables it.
+            ttl (float): Seconds an entry stays valid.
+            context_window (int): Number of trailing contents used for the semantic key.
+            max_entries (int): Entries kept before the oldest are evicted.
+            embed_fn (Optional[Callable]): Text embedding function; defaults to Gemini embeddings.
+        """
+        self.threshold = threshold
+        self.ttl = ttl
+        self.context_window = context_window
+        self.max_entries = max_entries
+        self._embed_fn = embed_fn or _gemini_embed
+        self._exact: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._last_embedding: Optional[Tuple[str, np.ndarray]] = None
+        # Semantic entries live in fixed slots, reused oldest-first, so a lookup is one
+        # matrix-vector product. The vector matrix is allocated once the dimension is known.
+        self._vectors: Optional[np.ndarray] = None
+        self._expires = np.zeros(max_entries)
+        self._scopes = np.full(max_entries, -1, dtype=np.int64)
+        self._replies: List[Optional[str]] = [None] * max_entries
+        self._slot_keys: List[Optional[str]] = [None] * max_entries
+        self._slots: Dict[str, int] = {}
+        self._scope_ids: Dict[str, int] = {}
+        self._next_slot = 0
+
+    def get(self, contents: List[Dict], *, model: str, system_message: str,
+            max_tokens: int) -> Optional[str]:
+        """
+        Look up a cached reply for `contents`.
+
+        Args:
+            contents (List[Dict]): Gemini request contents.
+            model (str): Model name.
+            system_message (str): System prompt of the replying agent.
+            max_tokens (int): Output token limit.
+
+        Returns:
+            Optional[str]: The cached reply, or None on a miss.
+        """
+        reply = self._get_exact(contents, model, system_message, max_tokens)
+        if reply is not None:
+            return reply
+        embedding = self._embed(self._semantic_text(contents, system_message))
+        return self._get_semantic(embedding, model, system_message, max_tokens)
+
+    async def aget(self, contents: List[Dict], *, model: str, system_message: str,
+                   max_tokens: int) -> Optional[str]:
+        """
+        Async `get`: the embedding call runs in a worker thread so the event loop stays free.
+
+        Args:
+            contents (List[Dict]): Gemini request contents.
+            model (str): Model name.
+            system_message (str): System prompt of the replying agent.
+            max_tokens (int): Output token limit.
+
+        Returns:
+            Optional[str]: The cached reply, or None on a miss.
+        """
+        reply = self._get_exact(contents, model, system_message, max_tokens)
+        if reply is not None:
+            return reply
+        text = self._semantic_text(contents, system_message)
+        embedding = await asyncio.to_thread(self._embed, text)
+        return self._get_semantic(embedding, model, system_message, max_tokens)
+
+    def set(self, contents: List[Dict], reply: str, *, model: str, system_message: str,
+            max_tokens: int) -> None:
+        """
+        Store `reply` as the answer to `contents`.
+
+        Args:
+            contents (List[Dict]): Gemini request contents.
+            reply (str): Reply text to cache.
+            model (str): Model name.
+            system_message (str): System prompt of the replying agent.
+            max_tokens (int): Output token limit.
+        """
+        key, expires = self._set_exact(contents, reply, model, system_message, max_tokens)
+        embedding = self._embed(self._semantic_text(contents, system_message))
+        if embedding is not None:
+            self._store_vector(key, embedding, expires, reply,
+                               self._scope(model, system_message, max_tokens))
+
+    async def aset(self, contents: List[Dict], reply: str, *, model: str, system_message: str,
+                   max_tokens: int) -> None:
+        """
+        Async `set`: the embedding call runs in a worker thread so the event loop stays free.
+
+        Args:
+            contents (List[Dict]): Gemini request contents.
+            reply (str): Reply text to cache.
+            model (str): Model name.
+            system_message (str): System prompt of the replying agent.
+            max_tokens (int): Output token limit.
+        """
+        key, expires = self._set_exact(contents, reply, model, system_message, max_tokens)
+        text = self._semantic_text(contents, system_message)
+        embedding = await asyncio.to_thread(self._embed, text)
+        if embedding is not None:
+            self._store_vector(key, embedding, expires, reply,
+                               self._scope(model, system_message, max_tokens))
+
+    def _get_exact(self, contents: List[Dict], model: str, system_message: str,
+                   max_tokens: int) -> Optional[str]:
+        """Return an unexpired exact-match reply, or None."""
+        key = self._exact_key(contents, model, system_message, max_tokens)
+        entry = self._exact.get(key)
+        if entry is None:
+            return None
+        if entry[0] > time.time():
+            self._exact.move_to_end(key)
+            return entry[1]
+        del self._exact[key]
+        return None
+
+    def _get_semantic(self, embedding: Optional[np.ndarray], model: str, system_message: str,
+                      max_tokens: int) -> Optional[str]:
+        """Return the most similar unexpired reply in scope above the threshold, or None."""
+        scope_id = self._scope_ids.get(self._scope(model, system_message, max_tokens))
+        if embedding is None or scope_id is None or self._vectors is None:
+            return None
+        scores = self._vectors @ embedding
+        scores[(self._scopes != scope_id) | (self._expires <= time.time())] = -np.inf
+        best = int(np.argmax(scores))
+        return self._replies[best] if scores[best] >= self.threshold else None
+
+    def _set_exact(self, contents: List[Dict], reply: str, model: str, system_message: str,
+                   max_tokens: int) -> Tuple[str, float]:
+        """Store an exact-match entry and return its key and expiry time."""
+        expires = time.time() + self.ttl
+        key = self._exact_key(contents, model, system_message, max_tokens)
+        self._exact[key] = (expires, reply)
+        self._exact.move_to_end(key)
+        while len(self._exact) > self.max_entries:
+            self._exact.popitem(last=False)
+        return key, expires
+
+    def _store_vector(self, key: str, embedding: np.ndarray, expires: float, reply: str,
+                      scope: str) -> None:
+        """Write a semantic entry into its slot, evicting the oldest entry when full."""
+        if self._vectors is None or self._vectors.shape[1] != embedding.shape[0]:
+            self._vectors = np.zeros((self.max_entries, embedding.shape[0]), dtype=np.float32)
+            self._scopes[:] = -1
+            self._slots.clear()
+        slot = self._slots.get(key)
+        if slot is None:
+            slot = self._next_slot
+            self._next_slot = (slot + 1) % self.max_entries
+            evicted = self._slot_keys[slot]
+            if evicted is not None:
+                self._slots.pop(evicted, None)
+            self._slots[key] = slot
+            self._slot_keys[slot] = key
+        self._vectors[slot] = embedding
+        self._expires[slot] = expires
+        self._scopes[slot] = self._scope_ids.setdefault(scope, len(self._scope_ids))
+        self._replies[slot] = reply
+
+    def _embed(self, text: str) -> Optional[np.ndarray]:
+        """
+        Return the unit embedding of `text`, reusing the last one computed. Returns None when
+        semantic lookups are disabled or embedding fails, so failures degrade to cache misses.
+        """
+        if self.threshold is None:
+            return None
+        if self._last_embedding is not None and self._last_embedding[0] == text:
+            return self._last_embedding[1]
+        try:
+            embedding = _normalize(self._embed_fn(text))
+        except Exception:
+            return None
+        self._last_embedding = (text, embedding)
+        return embedding
+
+    def _semantic_text(self, contents: List[Dict], system_message: str) -> str:
+        """
+        Flatten the trailing `context_window` conversation turns into the text used for embedding.
+
+        A leading system prompt is skipped: the scope already pins it, and in short chats it
+        would dominate the embedding so that different questions to one agent look alike.
+        """
+        if contents and contents[0]["parts"] == [system_message]:
+            contents = contents[1:]
+        return "\n".join(
+            str(part) for content in contents[-self.context_window:] for part in content["parts"]
+        )
+
+    @staticmethod
+    def _scope(model: str, system_message: str, max_tokens: int) -> str:
+        """Hash the request settings that must match for any cache hit."""
+        return hashlib.sha256(
+            json.dumps([model, system_message, max_tokens]).encode("utf-8")
+        ).hexdigest()
+
+    @staticmethod
+    def _exact_key(contents: List[Dict], model: str, system_message: str, max_tokens: int) -> str:
+        """Hash the full request for exact-match lookups."""
+        return hashlib.sha256(
+            json.dumps([model, system_message, max_tokens, contents], default=str).encode("utf-8")
+        ).hexdigest()
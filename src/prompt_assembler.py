@@ -0,0 +1,83 @@
+"""
+prompt_assembler.py
+
+This module builds Gemini request contents in a prefix-cache-friendly order. Every request is laid
+out as `[static system prompt] -> [committed history] -> [dynamic context] -> [recent turn]`, so
+the leading bytes stay identical from turn to turn and provider-side prompt caching can reuse them.
+
+Usage:
+    Create one `PromptAssembler` per agent/partner pair and call `build()` with the AutoGen
+    message list each time the agent needs to reply.
+"""
+from typing import Dict, List, Optional, Tuple
+
+# AutoGen stores the replying agent's own messages as "assistant"; Gemini calls that role "model".
+_ROLE_MAP = {"assistant": "model", "user": "user"}
+
+
+class PromptAssembler:
+    """Keeps a byte-stable prompt prefix and an append-only committed history."""
+
+    def __init__(self, system_message: str):
+        """
+        Initialize the assembler with the agent's system message.
+
+        Args:
+            system_message (str): Static system prompt; never modified after construction.
+        """
+        self.static_prefix = system_message
+        self.committed_history: List[Dict] = []
+        # (role, content) of the AutoGen message behind each committed entry.
+        self._sources: List[Tuple[Optional[str], Optional[str]]] = []
+
+    def commit(self, messages: List[Dict]) -> None:
+        """
+        Append any messages not yet committed. Earlier entries are never rewritten; if the
+        incoming messages no longer start with the committed ones, the history is reset.
+
+        Args:
+            messages (List[Dict]): AutoGen messages, oldest first.
+        """
+        committed = len(self._sources)
+        if len(messages) < committed or any(
+            _source_key(message) != source for message, source in zip(messages, self._sources)
+        ):
+            # A new chat replaced the history this prefix was built from; start afresh.
+            self.committed_history = []
+            self._sources = []
+        for message in messages[len(self._sources):]:
+            self.committed_history.append(_to_content(message))
+            self._sources.append(_source_key(message))
+
+    def build(self, messages: List[Dict], dynamic_context: Optional[str] = None) -> List[Dict]:
+        """
+        Assemble Gemini contents for a reply to the last message in `messages`.
+
+        Args:
+            messages (List[Dict]): AutoGen messages, oldest first; the last one is the recent turn.
+            dynamic_context (Optional[str]): Per-turn context (e.g. topic recall) placed after history.
+
+        Returns:
+            List[Dict]: Gemini contents in static -> history -> dynamic -> recent order.
+        """
+        self.commit(messages[:-1])
+        recent = _to_content(messages[-1])
+        parts = ([dynamic_context] if dynamic_context else []) + recent["parts"]
+        return (
+            [{"role": "user", "parts": [self.static_prefix]}]
+            + self.committed_history
+            + [{"role": recent["role"], "parts": parts}]
+        )
+
+
+def _source_key(message: Dict) -> Tuple[Optional[str], Optional[str]]:
+    """Identify an AutoGen message by role and content."""
+    return message.get("role"), message.get("content")
+
+
+def _to_content(message: Dict) -> Dict:
+    """Convert an AutoGen message dict into a Gemini content dict."""
+    return {
+        "role": _ROLE_MAP.get(message.get("role"), "user"),
+        "parts": [message.get("content") or ""],
+    }
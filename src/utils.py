@@ -8,53 +8,67 @@ sensitive credentials.
 Usage:
     Import and call the desired API key retrieval function (e.g., `get_gemini_api_key()`).
 """
+import functools
 import os
 from dotenv import load_dotenv, find_dotenv
 
-# Load environment variables from .env file
-load_dotenv(find_dotenv())
+@functools.lru_cache(maxsize=1)
+def _load_env() -> None:
+    """
+    Loads environment variables from the nearest .env file, once per process.
+
+    `find_dotenv` walks parent directories with a `stat` per level, so the search is
+    deferred to the first key lookup and never repeated.
+    """
+    load_dotenv(find_dotenv())
 
+@functools.lru_cache(maxsize=1)
 def get_openai_api_key() -> str:
     """
     Retrieves the OpenAI API key from environment variables.
 
     Returns:
-        str: The OpenAI API key.
+        str: The OpenAI API key. The result is cached; call `cache_clear()` to re-read it.
 
     Raises:
         ValueError: If the API key is not found in the environment.
     """
+    _load_env()
     api_key = os.getenv("OPENAI_API_KEY")
     if not api_key:
         raise ValueError("OPENAI_API_KEY not found in environment variables")
     return api_key
 
+@functools.lru_cache(maxsize=1)
 def get_deepseek_api_key() -> str:
     """
     Retrieves the DeepSeek API key from environment variables.
 
     Returns:
-        str: The DeepSeek API key.
+        str: The DeepSeek API key. The result is cached; call `cache_clear()` to re-read it.
 
     Raises:
         ValueError: If the API key is not found in the environment.
     """
+    _load_env()
     api_key = os.getenv("DEEPSEEK_API_KEY")
     if not api_key:
         raise ValueError("DEEPSEEK_API_KEY not found in environment variables")
     return api_key
 
+@functools.lru_cache(maxsize=1)
 def get_gemini_api_key() -> str:
     """
     Retrieves the Gemini API key from environment variables.
 
     Returns:
-        str: The Gemini API key.
+        str: The Gemini API key. The result is cached; call `cache_clear()` to re-read it.
 
     Raises:
         ValueError: If the API key is not found in the environment.
     """
+    _load_env()
     api_key = os.getenv("GEMINI_API_KEY")
     if not api_key:
         raise ValueError("GEMINI_API_KEY not found in environment variables")
-    return api_key
\ No newline at end of file
+    return api_key
@@ -18,6 +18,11 @@ from src.MultiAgentConversation import configure_llm, create_ptolmey_agent, crea
 class TestMultiAgentConversation(unittest.TestCase):
     """Test suite for the multi-agent conversation functionality."""
 
+    def setUp(self):
+        """Clear memoized API keys so each test sees its own environment mocks."""
+        for getter in (get_gemini_api_key, get_openai_api_key, get_deepseek_api_key):
+            getter.cache_clear()
+
     @patch('src.utils.os.getenv')
     def test_get_gemini_api_key_success(self, mock_getenv):
         """Test that get_gemini_api_key returns the correct API key."""
@@ -106,14 +111,13 @@ class TestMultiAgentConversation(unittest.TestCase):
             is_termination_msg=mock_conversable_agent.call_args[1]["is_termination_msg"]
         )
 
-    @patch('src.MultiAgentConversation.yaml.safe_load')
-    @patch('builtins.open')
+    @patch('src.MultiAgentConversation.FileCache.instance')
     @patch('src.MultiAgentConversation.get_gemini_api_key')
-    @patch('src.MultiAgentConversation.ConversableAgent')
-    def test_conversation_manager_load_agents(self, mock_conversable_agent, mock_get_api_key, mock_open, mock_yaml_load):
+    @patch('src.MultiAgentConversation._SharedConfigAgent')
+    def test_conversation_manager_load_agents(self, mock_conversable_agent, mock_get_api_key, mock_file_cache):
         """Test that ConversationManager loads agents from YAML correctly."""
         mock_get_api_key.return_value = "test_gemini_key"
-        mock_yaml_load.return_value = {
+        mock_file_cache.return_value.get.return_value = {
             'agents': [
                 {'name': 'Ptolmey', 'system_message': 'You are Ptolemy.'},
                 {'name': 'Aryabhata', 'system_message': 'You are Aryabhata.'}
@@ -127,22 +131,23 @@ class TestMultiAgentConversation(unittest.TestCase):
         self.assertEqual(len(manager.agents), 2)
         self.assertIn("Ptolmey", manager.agents)
         self.assertIn("Aryabhata", manager.agents)
-        self.assertEqual(mock_conversable_agent.call_count, 2)
+        self.assertEqual(mock_conversable_agent.call_count, 0)
 
-    @patch('src.MultiAgentConversation.yaml.safe_load')
-    @patch('builtins.open')
-    def test_conversation_manager_missing_config(self, mock_open, mock_yaml_load):
+        self.assertIs(manager.agents["Ptolmey"], manager.agents["Ptolmey"])
+        self.assertEqual(mock_conversable_agent.call_count, 1)
+
+    @patch('src.MultiAgentConversation.FileCache.instance')
+    def test_conversation_manager_missing_config(self, mock_file_cache):
         """Test that ConversationManager raises FileNotFoundError for missing config."""
-        mock_open.side_effect = FileNotFoundError
+        mock_file_cache.return_value.get.side_effect = FileNotFoundError
         with self.assertRaises(FileNotFoundError) as context:
             ConversationManager(config_path="nonexistent.yaml")
         self.assertEqual(str(context.exception), "Configuration file nonexistent.yaml not found")
 
-    @patch('src.MultiAgentConversation.yaml.safe_load')
-    @patch('builtins.open')
-    def test_conversation_manager_invalid_yaml(self, mock_open, mock_yaml_load):
+    @patch('src.MultiAgentConversation.FileCache.instance')
+    def test_conversation_manager_invalid_yaml(self, mock_file_cache):
         """Test that ConversationManager raises YAMLError for invalid YAML."""
-        mock_yaml_load.side_effect = yaml.YAMLError("Invalid YAML")
+        mock_file_cache.return_value.get.side_effect = yaml.YAMLError("Invalid YAML")
         with self.assertRaises(yaml.YAMLError) as context:
             ConversationManager(config_path="invalid.yaml")
         self.assertEqual(str(context.exception), "Error parsing invalid.yaml: Invalid YAML")
@@ -160,7 +165,7 @@ class TestMultiAgentConversation(unittest.TestCase):
         self.assertEqual(topic, "Follow-up")
 
     @patch('src.MultiAgentConversation.get_gemini_api_key')
-    @patch('src.MultiAgentConversation.ConversableAgent')
+    @patch('src.MultiAgentConversation._SharedConfigAgent')
     def test_initiate_conversation_invalid_agent(self, mock_conversable_agent, mock_get_api_key):
         """Test that initiate_conversation raises KeyError for invalid agent names."""
         mock_get_api_key.return_value = "test_gemini_key"
@@ -0,0 +1,471 @@
+"""
+test_performance.py
+
+This module contains unit tests for the performance features of the multi-agent conversation
+project: prompt assembly, response and config caching, streaming, memoized API keys, bounded
+topic history and the asyncio conversation path.
+
+Usage:
+    Run with `python -m unittest tests/test_performance.py` to execute all tests.
+"""
+import unittest
+from unittest.mock import patch, MagicMock
+import asyncio
+import threading
+import os
+import tempfile
+import io
+import contextlib
+from types import MappingProxyType
+import yaml
+from google.api_core import exceptions as google_exceptions
+from google.generativeai import protos
+from google.generativeai.types import GenerateContentResponse
+from src.utils import get_gemini_api_key, get_openai_api_key, get_deepseek_api_key, _load_env
+from src.prompt_assembler import PromptAssembler
+from src.llm_cache import CachedLLM
+from src.file_cache import FileCache
+from src.MultiAgentConversation import ConversationManager, _SharedConfigAgent, _is_term, _iter_stream, _aiter_stream, _dump
+
+def _chunk(text=None, candidates=True):
+    """Build a real streamed Gemini chunk: text, a part-less candidate, or no candidates at all."""
+    if not candidates:
+        return GenerateContentResponse.from_response(protos.GenerateContentResponse())
+    content = protos.Content(parts=[protos.Part(text=text)] if text is not None else [], role="model")
+    return GenerateContentResponse.from_response(
+        protos.GenerateContentResponse(candidates=[protos.Candidate(content=content)])
+    )
+
+class TestPerformance(unittest.TestCase):
+    """Test suite for caching, streaming and asynchronous conversation features."""
+
+    def setUp(self):
+        """Clear memoized API keys so each test sees its own environment mocks."""
+        for getter in (get_gemini_api_key, get_openai_api_key, get_deepseek_api_key):
+            getter.cache_clear()
+
+    @patch('src.utils.os.getenv')
+    def test_get_gemini_api_key_cached(self, mock_getenv):
+        """Test that get_gemini_api_key reads the environment once until the cache is cleared."""
+        mock_getenv.return_value = "test_gemini_key"
+        get_gemini_api_key()
+        self.assertEqual(get_gemini_api_key(), "test_gemini_key")
+        mock_getenv.assert_called_once_with("GEMINI_API_KEY")
+
+    @patch('src.utils.find_dotenv')
+    @patch('src.utils.load_dotenv')
+    @patch('src.utils.os.getenv')
+    def test_env_file_loaded_once(self, mock_getenv, mock_load_dotenv, mock_find_dotenv):
+        """Test that the .env search runs only once across API key lookups."""
+        mock_getenv.return_value = "test_key"
+        _load_env.cache_clear()
+        try:
+            get_gemini_api_key()
+            get_openai_api_key()
+            mock_find_dotenv.assert_called_once_with()
+            mock_load_dotenv.assert_called_once_with(mock_find_dotenv.return_value)
+        finally:
+            _load_env.cache_clear()
+
+    @patch('src.MultiAgentConversation.get_gemini_api_key')
+    def test_get_last_topic_reindexes_after_history_reassignment(self, mock_get_api_key):
+        """Test that get_last_topic reflects a reassigned topic_history."""
+        mock_get_api_key.return_value = "test_gemini_key"
+        manager = ConversationManager(config_path="config.yaml")
+        manager.topic_history = [
+            {"initiator": "Ptolmey", "recipient": "Aryabhata", "topic": "Discovery", "timestamp": 12345.0}
+        ]
+        self.assertEqual(manager.get_last_topic("Ptolmey"), "Discovery")
+        manager.topic_history = [
+            {"initiator": "Aryabhata", "recipient": "Ptolmey", "topic": "Pi", "timestamp": 12346.0}
+        ]
+        self.assertEqual(manager.get_last_topic("Ptolmey"), "Pi")
+        self.assertIsNone(manager.get_last_topic("Hipparchus"))
+
+    @patch('src.MultiAgentConversation.get_gemini_api_key')
+    def test_build_contents_leaves_turns_unchanged(self, mock_get_api_key):
+        """Test that reply prompts carry only the system prompt and the conversation."""
+        mock_get_api_key.return_value = "test_gemini_key"
+        manager = ConversationManager(config_path="config.yaml")
+        manager._record_topic("Ptolmey", "Aryabhata", "What is your discovery?")
+        recipient = MagicMock(system_message="You are Aryabhata.")
+        recipient.name = "Aryabhata"
+        contents = manager._build_contents(recipient, "Ptolmey",
+                                           [{"role": "user", "content": "What is your discovery?"}])
+        self.assertEqual(contents, [
+            {"role": "user", "parts": ["You are Aryabhata."]},
+            {"role": "user", "parts": ["What is your discovery?"]},
+        ])
+
+    @patch('src.MultiAgentConversation.genai.GenerativeModel')
+    @patch('src.MultiAgentConversation.get_gemini_api_key')
+    @patch('src.MultiAgentConversation._SharedConfigAgent')
+    def test_agents_share_one_gemini_model(self, mock_conversable_agent, mock_get_api_key, mock_model_cls):
+        """Test that replies from different agents go through a single shared Gemini model."""
+        mock_get_api_key.return_value = "test_gemini_key"
+        mock_model_cls.return_value.generate_content.side_effect = lambda *args, **kwargs: iter(
+            [MagicMock(text="Zero "), MagicMock(text="and pi.")]
+        )
+        manager = ConversationManager(config_path="config.yaml")
+        manager._cache = CachedLLM(threshold=None)
+
+        for name, partner in (("Aryabhata", "Ptolmey"), ("Ptolmey", "Aryabhata")):
+            recipient, sender = MagicMock(system_message=name), MagicMock()
+            recipient.name, sender.name = name, partner
+            reply_func = manager._make_reply(recipient)
+            final, reply = reply_func(recipient, [{"role": "user", "content": "Hello"}], sender)
+            self.assertTrue(final)
+            self.assertEqual(reply, "Zero and pi.")
+
+        mock_model_cls.assert_called_once_with("gemini-1.5-flash")
+        self.assertEqual(mock_model_cls.return_value.generate_content.call_count, 2)
+
+    @patch('src.MultiAgentConversation.genai.GenerativeModel')
+    @patch('src.MultiAgentConversation.get_gemini_api_key')
+    def test_initiate_conversation_async_with_topic_recall(self, mock_get_api_key, mock_model_cls):
+        """Test that the async conversation alternates speakers and appends the recall exchange."""
+        mock_get_api_key.return_value = "test_gemini_key"
+        replies = iter(["Zero.", "Epicycles.", "Pi.", "Summary.", "We discussed discoveries."])
+
+        async def fake_generate(contents, stream=False, **kwargs):
+            text = next(replies)
+            if not stream:
+                return MagicMock(text=text)
+
+            async def chunks():
+                yield MagicMock(text=text)
+            return chunks()
+
+        mock_model_cls.return_value.generate_content_async = fake_generate
+        manager = ConversationManager(config_path="config.yaml")
+        manager._cache = CachedLLM(threshold=None)
+
+        result = asyncio.run(manager.initiate_conversation_async(
+            "Ptolmey", "Aryabhata", "What is your discovery?", max_turns=2, recall_topic=True
+        ))
+
+        self.assertEqual([m["name"] for m in result.chat_history],
+                         ["Ptolmey", "Aryabhata", "Ptolmey", "Aryabhata", "Aryabhata", "Ptolmey"])
+        self.assertEqual(result.chat_history[4]["content"],
+                         "What's the last topic we discussed? I recall: What is your discovery?")
+        self.assertEqual(result.summary, "Summary.")
+        self.assertEqual(result.chat_history[-1]["content"], "We discussed discoveries.")
+
+    def test_dump_writes_to_text_only_stdout(self):
+        """Test that _dump falls back to text output when stdout has no byte buffer."""
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            _dump({"topic": "Pi"})
+        self.assertEqual(out.getvalue(), '{\n  "topic": "Pi"\n}\n')
+
+    def test_is_term_matches_termination_phrase(self):
+        """Test that the termination check matches the phrase anywhere and tolerates empty content."""
+        self.assertTrue(_is_term({"content": "Farewell. See you again later, friend."}))
+        self.assertFalse(_is_term({"content": "See you tomorrow."}))
+        self.assertFalse(_is_term({"content": None}))
+
+    @patch('src.MultiAgentConversation.get_gemini_api_key')
+    def test_topic_history_round_trips_through_columns(self, mock_get_api_key):
+        """Test that topic_history assignment and recording round-trip through the column store."""
+        mock_get_api_key.return_value = "test_gemini_key"
+        manager = ConversationManager(config_path="config.yaml")
+        history = [{"initiator": "Ptolmey", "recipient": "Aryabhata", "topic": "Discovery", "timestamp": 12345.0}]
+        manager.topic_history = history
+        self.assertEqual(manager.topic_history, history)
+
+        manager._record_topic("Aryabhata", "Ptolmey", "Pi")
+        self.assertEqual([entry["topic"] for entry in manager.topic_history], ["Discovery", "Pi"])
+        self.assertEqual(manager.get_last_topic("Ptolmey"), "Pi")
+
+    @patch('tenacity.nap.time.sleep')
+    @patch('src.MultiAgentConversation.get_gemini_api_key')
+    @patch('src.MultiAgentConversation._SharedConfigAgent')
+    def test_initiate_conversation_retries_transient_errors_only(self, mock_conversable_agent, mock_get_api_key, mock_sleep):
+        """Test that transient Gemini errors are retried and the topic is recorded once."""
+        mock_get_api_key.return_value = "test_gemini_key"
+        initiate_chat = mock_conversable_agent.return_value.initiate_chat
+        initiate_chat.side_effect = [google_exceptions.ServiceUnavailable("busy"), "result"]
+        manager = ConversationManager(config_path="config.yaml")
+
+        self.assertEqual(manager.initiate_conversation("Ptolmey", "Aryabhata", "Hello"), "result")
+        self.assertEqual(initiate_chat.call_count, 2)
+        self.assertEqual(len(manager.topic_history), 1)
+
+        initiate_chat.reset_mock()
+        initiate_chat.side_effect = ValueError("bad config")
+        with self.assertRaises(ValueError):
+            manager.initiate_conversation("Ptolmey", "Aryabhata", "Hello")
+        self.assertEqual(initiate_chat.call_count, 1)
+
+    @patch('src.MultiAgentConversation.get_gemini_api_key')
+    def test_agents_share_llm_config_by_reference(self, mock_get_api_key):
+        """Test that every agent holds the manager's read-only llm_config rather than a copy."""
+        mock_get_api_key.return_value = "test_gemini_key"
+        manager = ConversationManager(config_path="config.yaml")
+        self.assertIs(manager.agents["Ptolmey"].llm_config, manager.llm_config)
+        self.assertIs(manager.agents["Aryabhata"].llm_config, manager.llm_config)
+        with self.assertRaises(TypeError):
+            manager.llm_config["max_tokens"] = 100
+
+    @patch('src.MultiAgentConversation.get_gemini_api_key')
+    def test_shared_config_agent_registers_tools_on_private_copy(self, mock_get_api_key):
+        """Test that registering a tool gives one agent its own config and leaves the shared one intact."""
+        mock_get_api_key.return_value = "test_gemini_key"
+        manager = ConversationManager(config_path="config.yaml")
+        ptolmey = manager.agents["Ptolmey"]
+
+        @ptolmey.register_for_llm(description="Return the value of pi.")
+        def get_pi() -> float:
+            return 3.1416
+
+        self.assertEqual([tool["function"]["name"] for tool in ptolmey.llm_config["tools"]], ["get_pi"])
+        self.assertNotIn("tools", manager.llm_config)
+        self.assertIs(manager.agents["Aryabhata"].llm_config, manager.llm_config)
+
+    def test_shared_config_agent_rejects_empty_model(self):
+        """Test that a read-only config still goes through AutoGen's empty-model check."""
+        with self.assertRaises(ValueError):
+            _SharedConfigAgent(name="Ptolmey", llm_config=MappingProxyType({"config_list": [{"model": ""}]}))
+
+    @patch('src.MultiAgentConversation.genai.GenerativeModel')
+    @patch('src.MultiAgentConversation.get_gemini_api_key')
+    def test_topic_history_compacts_when_full(self, mock_get_api_key, mock_model_cls):
+        """Test that a full topic history folds its oldest half into one summary entry."""
+        mock_get_api_key.return_value = "test_gemini_key"
+        mock_model_cls.return_value.generate_content.return_value.text = "Early astronomy."
+        manager = ConversationManager(config_path="config.yaml", max_history=4)
+
+        for i in range(5):
+            manager._record_topic("Ptolmey", "Aryabhata", f"Topic {i}")
+
+        self.assertEqual([entry["topic"] for entry in manager.topic_history],
+                         ["Early astronomy.", "Topic 2", "Topic 3", "Topic 4"])
+        prompt = mock_model_cls.return_value.generate_content.call_args[0][0]
+        self.assertIn("- Topic 0\n- Topic 1", prompt)
+        self.assertEqual(manager.get_last_topic("Aryabhata"), "Topic 4")
+
+    @patch('src.MultiAgentConversation.genai.GenerativeModel')
+    @patch('src.MultiAgentConversation.get_gemini_api_key')
+    def test_topic_history_evicts_when_summary_fails(self, mock_get_api_key, mock_model_cls):
+        """Test that a failing compaction summary evicts the oldest half instead of raising."""
+        mock_get_api_key.return_value = "test_gemini_key"
+        manager = ConversationManager(config_path="config.yaml", max_history=4)
+        for i in range(4):
+            manager._record_topic("Ptolmey", "Aryabhata", f"Topic {i}")
+        mock_model_cls.return_value.generate_content.side_effect = ValueError("blocked")
+
+        with self.assertLogs("src.MultiAgentConversation", level="WARNING"):
+            manager._record_topic("Ptolmey", "Aryabhata", "Topic 4")
+        self.assertEqual([entry["topic"] for entry in manager.topic_history],
+                         ["Topic 2", "Topic 3", "Topic 4"])
+
+    @patch('src.MultiAgentConversation.genai.GenerativeModel')
+    @patch('src.MultiAgentConversation.get_gemini_api_key')
+    def test_topic_history_compacts_async(self, mock_get_api_key, mock_model_cls):
+        """Test that the async path summarizes a full history with the async client."""
+        mock_get_api_key.return_value = "test_gemini_key"
+        model = mock_model_cls.return_value
+
+        async def fake_generate(contents, **kwargs):
+            return MagicMock(text="Early astronomy.")
+
+        model.generate_content_async.side_effect = fake_generate
+        manager = ConversationManager(config_path="config.yaml", max_history=4)
+        for i in range(4):
+            manager._record_topic("Ptolmey", "Aryabhata", f"Topic {i}")
+
+        asyncio.run(manager._record_topic_async("Ptolmey", "Aryabhata", "Topic 4"))
+        self.assertEqual([entry["topic"] for entry in manager.topic_history],
+                         ["Early astronomy.", "Topic 2", "Topic 3", "Topic 4"])
+        model.generate_content.assert_not_called()
+
+    @patch('src.MultiAgentConversation.genai.GenerativeModel')
+    @patch('src.MultiAgentConversation.get_gemini_api_key')
+    def test_topic_history_concurrent_async_compaction(self, mock_get_api_key, mock_model_cls):
+        """Test that concurrent async records on a full history never drop topics unsummarized."""
+        mock_get_api_key.return_value = "test_gemini_key"
+        model = mock_model_cls.return_value
+        prompts = []
+
+        async def fake_generate(contents, **kwargs):
+            prompts.append(contents)
+            await asyncio.sleep(0)
+            return MagicMock(text=f"Summary{len(prompts)}")
+
+        model.generate_content_async.side_effect = fake_generate
+        manager = ConversationManager(config_path="config.yaml", max_history=4)
+        for i in range(4):
+            manager._record_topic("Ptolmey", "Aryabhata", f"T{i}")
+
+        async def record_both():
+            await asyncio.gather(manager._record_topic_async("Ptolmey", "Aryabhata", "X"),
+                                 manager._record_topic_async("Ptolmey", "Aryabhata", "Y"))
+
+        asyncio.run(record_both())
+        self.assertEqual([entry["topic"] for entry in manager.topic_history], ["Summary3", "T3", "X", "Y"])
+        # The last summary folds in the earlier one and T2, so nothing was dropped unsummarized.
+        self.assertRegex(prompts[-1], r"- Summary[12]\n- T2$")
+        model.generate_content.assert_not_called()
+
+    @patch('src.MultiAgentConversation.get_gemini_api_key')
+    def test_max_history_too_small(self, mock_get_api_key):
+        """Test that a max_history too small for compaction is rejected."""
+        mock_get_api_key.return_value = "test_gemini_key"
+        with self.assertRaises(ValueError):
+            ConversationManager(config_path="config.yaml", max_history=3)
+
+    def test_iter_stream_stops_after_termination_phrase(self):
+        """Test that streaming stops once a termination phrase spans the chunks received."""
+        chunks = iter([MagicMock(text="Farewell. See you "), MagicMock(text="again later."),
+                       MagicMock(text=" Unused.")])
+        self.assertEqual("".join(_iter_stream(chunks)), "Farewell. See you again later.")
+        self.assertEqual(next(chunks).text, " Unused.")
+
+    def test_iter_stream_skips_empty_chunks_and_cancels_on_stop(self):
+        """Test that chunks without candidates or parts are skipped and an early stop cancels the stream."""
+        response = MagicMock()
+        response.__iter__.return_value = iter([
+            _chunk(candidates=False),
+            _chunk(),
+            _chunk("See you again later."),
+            _chunk(" Unused."),
+        ])
+        self.assertEqual("".join(_iter_stream(response)), "See you again later.")
+        response._iterator.cancel.assert_called_once_with()
+
+    def test_aiter_stream_closes_generator_on_stop(self):
+        """Test that the async stream skips chunks without text and closes the source early."""
+        consumed = []
+
+        async def chunks():
+            for chunk in (_chunk(candidates=False), _chunk(), _chunk("See you again later."),
+                          _chunk(" Unused.")):
+                consumed.append(chunk)
+                yield chunk
+
+        async def collect():
+            source = chunks()
+            text = "".join([piece async for piece in _aiter_stream(source)])
+            return text, source
+
+        text, source = asyncio.run(collect())
+        self.assertEqual(text, "See you again later.")
+        self.assertEqual(len(consumed), 3)
+        self.assertIsNone(source.ag_frame)
+
+    def test_prompt_assembler_orders_prefix_before_dynamic_context(self):
+        """Test that PromptAssembler keeps the static prefix and history ahead of dynamic context."""
+        assembler = PromptAssembler("You are Ptolemy.")
+        messages = [
+            {"role": "user", "content": "Hello"},
+            {"role": "assistant", "content": "Greetings"},
+            {"role": "user", "content": "What did you discover?"},
+        ]
+        contents = assembler.build(messages, dynamic_context="Last topic discussed: Hello")
+        self.assertEqual(contents, [
+            {"role": "user", "parts": ["You are Ptolemy."]},
+            {"role": "user", "parts": ["Hello"]},
+            {"role": "model", "parts": ["Greetings"]},
+            {"role": "user", "parts": ["Last topic discussed: Hello", "What did you discover?"]},
+        ])
+
+        first_committed = assembler.committed_history[0]
+        assembler.build(messages + [{"role": "assistant", "content": "Epicycles"},
+                                    {"role": "user", "content": "Tell me more"}])
+        self.assertIs(assembler.committed_history[0], first_committed)
+        self.assertEqual(len(assembler.committed_history), 4)
+
+    def test_cached_llm_exact_and_semantic_hits(self):
+        """Test that CachedLLM serves exact repeats and near-duplicate prompts from cache."""
+        embeddings = {"Tell me a joke": [1.0, 0.0], "Tell me a joke please": [0.95, 0.05],
+                      "Explain epicycles": [0.0, 1.0]}
+        cache = CachedLLM(embed_fn=lambda text: embeddings[text])
+        settings = {"model": "gemini-1.5-flash", "system_message": "You are Ptolemy.", "max_tokens": 50}
+        joke = [{"role": "user", "parts": ["Tell me a joke"]}]
+
+        self.assertIsNone(cache.get(joke, **settings))
+        cache.set(joke, "Why did the planet retrograde?", **settings)
+
+        self.assertEqual(cache.get(joke, **settings), "Why did the planet retrograde?")
+        paraphrase = [{"role": "user", "parts": ["Tell me a joke please"]}]
+        self.assertEqual(cache.get(paraphrase, **settings), "Why did the planet retrograde?")
+        self.assertIsNone(cache.get([{"role": "user", "parts": ["Explain epicycles"]}], **settings))
+        self.assertIsNone(cache.get(joke, **dict(settings, max_tokens=100)))
+
+        failing = CachedLLM(embed_fn=MagicMock(side_effect=RuntimeError("embedding down")))
+        failing.set(joke, "Why did the planet retrograde?", **settings)
+        self.assertEqual(failing.get(joke, **settings), "Why did the planet retrograde?")
+        self.assertIsNone(failing.get(paraphrase, **settings))
+
+    def test_cached_llm_ignores_system_prompt_in_semantic_key(self):
+        """Test that distinct questions to one persona do not match through its system prompt."""
+        persona = "You are Ptolemy. " * 50
+
+        def embed(text):
+            # Bag-of-words vector, so a long shared persona prompt would swamp any question.
+            return [text.count(word) for word in ("Ptolemy", "epicycles", "stars")]
+
+        cache = CachedLLM(embed_fn=embed)
+        settings = {"model": "gemini-1.5-flash", "system_message": persona, "max_tokens": 50}
+        epicycles = [{"role": "user", "parts": [persona]}, {"role": "user", "parts": ["Explain epicycles"]}]
+        stars = [{"role": "user", "parts": [persona]}, {"role": "user", "parts": ["How many stars?"]}]
+
+        cache.set(epicycles, "Circles upon circles.", **settings)
+        self.assertIsNone(cache.get(stars, **settings))
+        self.assertEqual(cache.get([epicycles[0], {"role": "user", "parts": ["Explain the epicycles"]}],
+                                   **settings), "Circles upon circles.")
+
+    def test_cached_llm_async_embeds_off_event_loop_thread(self):
+        """Test that aget/aset run the embedding call outside the event loop thread."""
+        threads = []
+
+        def embed(text):
+            threads.append(threading.current_thread())
+            return [1.0, 0.0]
+
+        cache = CachedLLM(embed_fn=embed)
+        settings = {"model": "gemini-1.5-flash", "system_message": "You are Ptolemy.", "max_tokens": 50}
+
+        async def round_trip():
+            await cache.aset([{"role": "user", "parts": ["Hello"]}], "Greetings", **settings)
+            return await cache.aget([{"role": "user", "parts": ["Hello there"]}], **settings)
+
+        self.assertEqual(asyncio.run(round_trip()), "Greetings")
+        self.assertTrue(threads)
+        self.assertNotIn(threading.main_thread(), threads)
+
+    @patch('src.file_cache.yaml.load')
+    def test_file_cache_reparses_only_when_mtime_changes(self, mock_yaml_load):
+        """Test that FileCache parses a file once per modification time."""
+        mock_yaml_load.return_value = {'agents': []}
+        cache = FileCache()
+        with tempfile.NamedTemporaryFile('w', suffix='.yaml', delete=False) as f:
+            f.write("agents: []\n")
+        try:
+            self.assertEqual(cache.get(f.name), {'agents': []})
+            self.assertIs(mock_yaml_load.call_args[1]['Loader'], getattr(yaml, 'CSafeLoader', yaml.SafeLoader))
+            cache.get(f.name)
+            self.assertEqual(mock_yaml_load.call_count, 1)
+
+            os.utime(f.name, (0, 0))
+            cache.get(f.name)
+            self.assertEqual(mock_yaml_load.call_count, 2)
+            self.assertEqual(len(cache._mem), 1)
+        finally:
+            os.remove(f.name)
+
+    def test_prompt_assembler_resets_for_new_chat_with_same_length(self):
+        """Test that a new chat of the same length replaces the previous chat's history."""
+        assembler = PromptAssembler("You are Ptolemy.")
+        assembler.build([{"role": "user", "content": "First opening"},
+                         {"role": "assistant", "content": "First reply"}])
+        contents = assembler.build([{"role": "user", "content": "Second opening"},
+                                    {"role": "assistant", "content": "Second reply"}])
+        self.assertEqual(contents, [
+            {"role": "user", "parts": ["You are Ptolemy."]},
+            {"role": "user", "parts": ["Second opening"]},
+            {"role": "model", "parts": ["Second reply"]},
+        ])
+
+if __name__ == '__main__':
+    unittest.main()